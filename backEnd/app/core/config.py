@@ -0,0 +1,9 @@
+import os
+
+# Upstream scheduler limits (see app/core/scheduler.py)
+UPSTREAM_MAX_CONCURRENCY = int(os.getenv("UPSTREAM_MAX_CONCURRENCY", "16"))
+UPSTREAM_SESSION_CONCURRENCY = int(os.getenv("UPSTREAM_SESSION_CONCURRENCY", "4"))
+UPSTREAM_ACCOUNT_CONCURRENCY = int(os.getenv("UPSTREAM_ACCOUNT_CONCURRENCY", "8"))
+# Share of the global, session and account limits that bulk downloads may
+# hold at once, so interactive requests always find a free slot
+UPSTREAM_BULK_SHARE = float(os.getenv("UPSTREAM_BULK_SHARE", "0.5"))
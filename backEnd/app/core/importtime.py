@@ -0,0 +1,59 @@
+"""
+Import-time report for the API process
+
+Run `python -m app.core.importtime` from the backEnd directory to print the
+slowest imports reported by `python -X importtime` for `app.main`.
+"""
+import re
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def parse_importtime(stderr: str, limit: int = 15) -> List[Dict[str, Any]]:
+    """
+    Parse `-X importtime` output
+
+    Returns:
+        The slowest imports sorted by cumulative time, in milliseconds
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        entries.append({
+            "module": name,
+            "self_ms": int(self_us) / 1000,
+            "cumulative_ms": int(cumulative_us) / 1000,
+            "depth": len(indent) // 2,
+        })
+
+    entries.sort(key=lambda entry: entry["cumulative_ms"], reverse=True)
+    return entries[:limit]
+
+
+def importtime_report(module: str = "app.main", limit: int = 15) -> List[Dict[str, Any]]:
+    """Import a module in a fresh interpreter with `-X importtime` and parse the output"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr}")
+    return parse_importtime(result.stderr, limit)
+
+
+def main() -> None:
+    module = sys.argv[1] if len(sys.argv) > 1 else "app.main"
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for entry in importtime_report(module):
+        print(f"{entry['cumulative_ms']:>14.1f} {entry['self_ms']:>9.1f}  {entry['module']}")
+
+
+if __name__ == "__main__":
+    main()
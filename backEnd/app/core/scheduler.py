@@ -0,0 +1,224 @@
+"""
+Fair scheduler for upstream crawler traffic
+
+Every call to an external site goes through `UpstreamScheduler.slot()`.
+Requests are admitted by weighted fair queuing, with one flow per account
+and priority class so that interactive traffic is weighted ahead of bulk
+downloads, including the account's own downloads. Requests are held back
+while their session or account is at its concurrency quota. Bulk requests
+may only use `bulk_share` of the global limit and of each quota, so
+interactive requests always have headroom.
+"""
+import asyncio
+import itertools
+import math
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from app.core import config
+
+
+class Priority(str, Enum):
+    INTERACTIVE = "interactive"
+    BULK = "bulk"
+
+
+# Fair-queuing weights: an interactive request costs 1/8 of a bulk one
+PRIORITY_WEIGHTS = {
+    Priority.INTERACTIVE: 8.0,
+    Priority.BULK: 1.0,
+}
+
+
+class _Ticket:
+    def __init__(self, session: str, account: str, priority: Priority, start_tag: float, finish_tag: float, seq: int):
+        self.session = session
+        self.account = account
+        self.priority = priority
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.future: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+
+
+class UpstreamScheduler:
+    def __init__(
+        self,
+        max_concurrency: int,
+        session_concurrency: int,
+        account_concurrency: int,
+        bulk_share: float = 0.5,
+    ):
+        self.max_concurrency = max_concurrency
+        self.session_concurrency = session_concurrency
+        self.account_concurrency = account_concurrency
+        self.bulk_concurrency = _bulk_limit(max_concurrency, bulk_share)
+        self.session_bulk_concurrency = _bulk_limit(session_concurrency, bulk_share)
+        self.account_bulk_concurrency = _bulk_limit(account_concurrency, bulk_share)
+
+        self._waiting: List[_Ticket] = []
+        self._seq = itertools.count()
+        self._virtual_time = 0.0
+        self._last_finish: Dict[Tuple[str, Priority], float] = defaultdict(float)
+
+        self._in_flight = 0
+        self._in_flight_by_priority: Dict[Priority, int] = defaultdict(int)
+        self._in_flight_by_session: Dict[str, int] = defaultdict(int)
+        self._in_flight_by_account: Dict[str, int] = defaultdict(int)
+        self._bulk_by_session: Dict[str, int] = defaultdict(int)
+        self._bulk_by_account: Dict[str, int] = defaultdict(int)
+
+        self._wait_samples: Dict[Priority, Deque[float]] = {
+            priority: deque(maxlen=1024) for priority in Priority
+        }
+        self._admitted: Dict[Priority, int] = defaultdict(int)
+
+    @asynccontextmanager
+    async def slot(self, session: str, account: str, priority: Priority = Priority.INTERACTIVE):
+        """
+        Hold an upstream slot for the duration of the block
+
+        Args:
+            session: Session key (the bearer token, or email before login)
+            account: Account key shared by all sessions of one customer
+            priority: Priority class of the request
+        """
+        ticket = self._enqueue(session, account, priority)
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Admitted just as the caller went away
+                self._release(ticket)
+            elif ticket in self._waiting:
+                self._waiting.remove(ticket)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(ticket)
+
+    def _enqueue(self, session: str, account: str, priority: Priority) -> _Ticket:
+        # Separate flows per class, so an account's bulk backlog does not
+        # push back its own interactive requests
+        flow = (account, priority)
+        start_tag = max(self._virtual_time, self._last_finish[flow])
+        finish_tag = start_tag + 1.0 / PRIORITY_WEIGHTS[priority]
+        self._last_finish[flow] = finish_tag
+
+        ticket = _Ticket(session, account, priority, start_tag, finish_tag, next(self._seq))
+        self._waiting.append(ticket)
+        self._dispatch()
+        return ticket
+
+    def _eligible(self, ticket: _Ticket) -> bool:
+        if self._in_flight_by_session[ticket.session] >= self.session_concurrency:
+            return False
+        if self._in_flight_by_account[ticket.account] >= self.account_concurrency:
+            return False
+        if ticket.priority == Priority.BULK:
+            if self._in_flight_by_priority[Priority.BULK] >= self.bulk_concurrency:
+                return False
+            if self._bulk_by_session[ticket.session] >= self.session_bulk_concurrency:
+                return False
+            if self._bulk_by_account[ticket.account] >= self.account_bulk_concurrency:
+                return False
+        return True
+
+    def _dispatch(self) -> None:
+        """Admit waiting requests in finish-tag order while capacity allows"""
+        self._waiting.sort(key=lambda ticket: (ticket.finish_tag, ticket.seq))
+        index = 0
+        while self._in_flight < self.max_concurrency and index < len(self._waiting):
+            ticket = self._waiting[index]
+            if ticket.future.done():
+                # Cancelled while queued; its task has not resumed yet
+                del self._waiting[index]
+                continue
+            if not self._eligible(ticket):
+                index += 1
+                continue
+
+            del self._waiting[index]
+            self._virtual_time = max(self._virtual_time, ticket.start_tag)
+            self._in_flight += 1
+            self._in_flight_by_priority[ticket.priority] += 1
+            self._in_flight_by_session[ticket.session] += 1
+            self._in_flight_by_account[ticket.account] += 1
+            if ticket.priority == Priority.BULK:
+                self._bulk_by_session[ticket.session] += 1
+                self._bulk_by_account[ticket.account] += 1
+            self._admitted[ticket.priority] += 1
+            self._wait_samples[ticket.priority].append(time.monotonic() - ticket.enqueued_at)
+            ticket.future.set_result(None)
+
+        if not self._waiting and not self._in_flight:
+            # Idle: forget per-flow history so tags do not grow forever
+            self._virtual_time = 0.0
+            self._last_finish.clear()
+
+    def _release(self, ticket: _Ticket) -> None:
+        self._in_flight -= 1
+        self._in_flight_by_priority[ticket.priority] -= 1
+        self._decrement(self._in_flight_by_session, ticket.session)
+        self._decrement(self._in_flight_by_account, ticket.account)
+        if ticket.priority == Priority.BULK:
+            self._decrement(self._bulk_by_session, ticket.session)
+            self._decrement(self._bulk_by_account, ticket.account)
+        self._dispatch()
+
+    @staticmethod
+    def _decrement(counts: Dict[str, int], key: str) -> None:
+        counts[key] -= 1
+        if counts[key] <= 0:
+            del counts[key]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth, in-flight counts and wait times (ms) per priority class"""
+        classes = {}
+        for priority in Priority:
+            samples = sorted(self._wait_samples[priority])
+            classes[priority.value] = {
+                "queue_depth": sum(1 for ticket in self._waiting if ticket.priority == priority),
+                "in_flight": self._in_flight_by_priority[priority],
+                "admitted": self._admitted[priority],
+                "wait_ms_p50": _percentile_ms(samples, 0.50),
+                "wait_ms_p99": _percentile_ms(samples, 0.99),
+                "wait_ms_max": _percentile_ms(samples, 1.0),
+            }
+        return {
+            "max_concurrency": self.max_concurrency,
+            "bulk_concurrency": self.bulk_concurrency,
+            "session_bulk_concurrency": self.session_bulk_concurrency,
+            "account_bulk_concurrency": self.account_bulk_concurrency,
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiting),
+            "classes": classes,
+        }
+
+
+def _bulk_limit(limit: int, bulk_share: float) -> int:
+    """Part of a limit that bulk requests may hold, leaving room for interactive ones"""
+    if limit <= 1:
+        return limit
+    return min(limit - 1, max(1, math.floor(limit * bulk_share)))
+
+
+def _percentile_ms(samples: List[float], fraction: float) -> Optional[float]:
+    if not samples:
+        return None
+    index = min(len(samples) - 1, math.ceil(fraction * len(samples)) - 1)
+    return round(samples[max(index, 0)] * 1000, 1)
+
+
+upstream_scheduler = UpstreamScheduler(
+    max_concurrency=config.UPSTREAM_MAX_CONCURRENCY,
+    session_concurrency=config.UPSTREAM_SESSION_CONCURRENCY,
+    account_concurrency=config.UPSTREAM_ACCOUNT_CONCURRENCY,
+    bulk_share=config.UPSTREAM_BULK_SHARE,
+)
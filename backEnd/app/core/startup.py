@@ -0,0 +1,117 @@
+"""
+Startup timing and warm-up state for the API process
+
+The API has no connection pools or caches yet, so "warm" means that every
+registered crawler module has been imported.
+"""
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.services import crawler_registry
+
+logger = logging.getLogger(__name__)
+
+
+def _process_start() -> Tuple[float, str]:
+    """
+    Monotonic timestamp of process creation, and the clock it was taken from
+
+    On Linux this is derived from the process start time in /proc/self/stat,
+    so interpreter startup and server imports are included. Elsewhere it
+    falls back to the time this module was imported.
+    """
+    try:
+        with open("/proc/self/stat") as stat:
+            # The command name may contain spaces; fields resume after ")"
+            fields = stat.read().rsplit(")", 1)[1].split()
+        start_ticks = int(fields[19])
+        started_since_boot = start_ticks / os.sysconf("SC_CLK_TCK")
+        age = time.clock_gettime(time.CLOCK_BOOTTIME) - started_since_boot
+        return time.monotonic() - max(age, 0.0), "process"
+    except (OSError, ValueError, IndexError, AttributeError):
+        return time.monotonic(), "import"
+
+
+PROCESS_START, PROCESS_START_CLOCK = _process_start()
+
+# Only API requests count as the first served request; probes, metrics
+# scrapes and the docs pages do not
+API_PATH_PREFIX = "/api/"
+
+STARTUP_TARGET_MS = 300.0
+
+_state: Dict[str, Optional[float]] = {
+    "app_loaded": None,
+    "warm": None,
+    "first_request": None,
+}
+_warm_up_error: Optional[str] = None
+
+
+def _elapsed_ms() -> float:
+    return round((time.monotonic() - PROCESS_START) * 1000, 1)
+
+
+def mark(event: str) -> None:
+    """Record the first time a startup event happens"""
+    if _state.get(event) is None:
+        _state[event] = _elapsed_ms()
+
+
+async def warm_up() -> None:
+    """
+    Load crawler modules in the background once the server is accepting requests
+
+    Runs in a worker thread so that imports do not block the event loop
+    while the first requests are being served. A failure is logged and
+    reported by `readiness()` instead of being lost in the background task.
+    """
+    global _warm_up_error
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, crawler_registry.warm_up)
+    except Exception as e:
+        _warm_up_error = f"{type(e).__name__}: {e}"
+        logger.exception("Crawler warm-up failed")
+        return
+    mark("warm")
+
+
+class FirstRequestMiddleware:
+    """
+    Pure ASGI middleware that records when the first API request arrives
+
+    The mark is taken before the request is handled, so upstream latency is
+    not counted. Once it is set every request is passed straight through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if (
+            _state["first_request"] is None
+            and scope["type"] == "http"
+            and scope["path"].startswith(API_PATH_PREFIX)
+        ):
+            mark("first_request")
+        await self.app(scope, receive, send)
+
+
+def readiness() -> Dict[str, Any]:
+    """Snapshot of the warm-up state for the readiness endpoint"""
+    return {
+        "ready": _state["warm"] is not None,
+        "error": _warm_up_error,
+        "crawlers": crawler_registry.loaded_crawlers(),
+        "measured_from": PROCESS_START_CLOCK,
+        "app_loaded_ms": _state["app_loaded"],
+        "warm_ms": _state["warm"],
+        "first_request_ms": _state["first_request"],
+        "target_ms": STARTUP_TARGET_MS,
+        "uptime_ms": _elapsed_ms(),
+    }
+
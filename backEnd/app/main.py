@@ -1,8 +1,23 @@
+# Imported first so the import-time fallback clock starts before anything else
+from app.core import startup
+from contextlib import asynccontextmanager
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from app.routers import auth
+from app.core.scheduler import upstream_scheduler
 
-app = FastAPI(title="Site Crawler API", version="1.0.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load crawler modules in the background so startup does not wait for them
+    warm_up_task = asyncio.create_task(startup.warm_up())
+    yield
+    warm_up_task.cancel()
+
+
+app = FastAPI(title="Site Crawler API", version="1.0.0", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -13,8 +28,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(startup.FirstRequestMiddleware)
+
+
 app.include_router(auth.router, prefix="/api", tags=["Authentication"])
 
 @app.get("/")
 def read_root():
-    return {"message": "Site Crawler API is running"}
\ No newline at end of file
+    return {"message": "Site Crawler API is running"}
+
+
+@app.get("/ready")
+def read_ready():
+    """Readiness probe: 503 until crawler modules are loaded"""
+    report = startup.readiness()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@app.get("/metrics/scheduler")
+def read_scheduler_metrics():
+    """Upstream scheduler queue depth, in-flight counts and wait times"""
+    return upstream_scheduler.metrics()
+
+
+startup.mark("app_loaded")
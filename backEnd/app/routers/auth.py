@@ -7,8 +7,8 @@ from app.models.schemas import (
     LoginResponse,
     DealsResponse
 )
-from app.services.fo1_crawler import FO1Crawler
-from app.services.fo2_crawler import FO2Crawler
+from app.services.crawler_registry import load_crawler_class
+from app.core.scheduler import Priority, upstream_scheduler
 
 router = APIRouter()
 
@@ -18,17 +18,33 @@ active_sessions = {}
 
 def get_crawler(website: str):
     """Factory function to get the appropriate crawler"""
-    crawlers = {
-        "fo1": FO1Crawler(),
-        "fo2": FO2Crawler(),
-    }
-    crawler = crawlers.get(website.lower())
-    if not crawler:
+    crawler_class = load_crawler_class(website)
+    if not crawler_class:
         raise HTTPException(
             status_code=400,
             detail=f"Unsupported website: {website}"
         )
-    return crawler
+    return crawler_class()
+
+
+def upstream_slot(token: str, session: dict, priority: Priority = Priority.INTERACTIVE):
+    """Reserve a scheduler slot for a crawler call made on behalf of a session"""
+    return upstream_scheduler.slot(token, session["account"], priority)
+
+
+def get_account_key(response: dict, website: str, email: str) -> str:
+    """
+    Account key for concurrency quotas, falling back to the email
+
+    Keys are prefixed with the website since each site has its own IDs.
+    """
+    success = response.get("success")
+    data = success if isinstance(success, dict) else response
+    user = data.get("user")
+    account = user.get("account") if isinstance(user, dict) else None
+    if isinstance(account, dict) and account.get("id") is not None:
+        return f"{website.lower()}:{account['id']}"
+    return f"{website.lower()}:{email}"
 
 
 def get_token_from_header(authorization: Optional[str]) -> str:
@@ -68,8 +84,10 @@ async def login(request: LoginRequest):
     try:
         crawler = get_crawler(request.website)
 
-        # Call the external API
-        response = await crawler.login(request.email, request.password)
+        # Call the external API (no session yet, so the email is the key)
+        email_key = f"{request.website.lower()}:{request.email}"
+        async with upstream_scheduler.slot(email_key, email_key):
+            response = await crawler.login(request.email, request.password)
 
         # Store the token for this session (handle both response formats)
         token = None
@@ -81,7 +99,8 @@ async def login(request: LoginRequest):
         if token:
             active_sessions[token] = {
                 "website": request.website,
-                "email": request.email
+                "email": request.email,
+                "account": get_account_key(response, request.website, request.email)
             }
 
         return response
@@ -128,7 +147,8 @@ async def get_deals(authorization: Optional[str] = Header(None)):
         crawler = get_crawler(session["website"])
 
         # Call the external API
-        response = await crawler.get_deals(token)
+        async with upstream_slot(token, session):
+            response = await crawler.get_deals(token)
 
         return response
 
@@ -160,7 +180,8 @@ async def get_deal_files(
         session = active_sessions[token]
         
         crawler = get_crawler(session["website"])
-        files = await crawler.get_deal_files(deal_id, token)
+        async with upstream_slot(token, session):
+            files = await crawler.get_deal_files(deal_id, token)
         
         return files
         
@@ -193,7 +214,8 @@ async def get_deal_folders(
         session = active_sessions[token]
         
         crawler = get_crawler(session["website"])
-        folders = await crawler.get_deal_folders(deal_id, token)
+        async with upstream_slot(token, session):
+            folders = await crawler.get_deal_folders(deal_id, token)
         
         return folders
         
@@ -228,7 +250,8 @@ async def download_file(
         session = active_sessions[token]
         
         crawler = get_crawler(session["website"])
-        file_content = await crawler.download_file(file_url, token)
+        async with upstream_slot(token, session, Priority.BULK):
+            file_content = await crawler.download_file(file_url, token)
         
         # Return file as streaming response
         return StreamingResponse(
@@ -1,5 +1,4 @@
 from abc import ABC, abstractmethod
-import httpx
 from typing import Dict, Any
 
 class BaseCrawler(ABC):
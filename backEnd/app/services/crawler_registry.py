@@ -0,0 +1,45 @@
+import importlib
+from typing import Dict, List, Optional, Type
+
+from .base_crawler import BaseCrawler
+
+# Crawler modules are imported on first use so that process startup only
+# pays for the sites that are actually requested.
+CRAWLERS: Dict[str, str] = {
+    "fo1": "app.services.fo1_crawler:FO1Crawler",
+    "fo2": "app.services.fo2_crawler:FO2Crawler",
+}
+
+_loaded: Dict[str, Type[BaseCrawler]] = {}
+
+
+def load_crawler_class(website: str) -> Optional[Type[BaseCrawler]]:
+    """
+    Import and return the crawler class registered for a website
+
+    Returns:
+        The crawler class, or None if the website is not registered
+    """
+    key = website.lower()
+    crawler_class = _loaded.get(key)
+    if crawler_class is None:
+        target = CRAWLERS.get(key)
+        if target is None:
+            return None
+        module_name, class_name = target.split(":")
+        module = importlib.import_module(module_name)
+        crawler_class = getattr(module, class_name)
+        _loaded[key] = crawler_class
+    return crawler_class
+
+
+def warm_up() -> List[str]:
+    """Import every registered crawler module and return the loaded site keys"""
+    for website in CRAWLERS:
+        load_crawler_class(website)
+    return loaded_crawlers()
+
+
+def loaded_crawlers() -> List[str]:
+    """Site keys whose crawler modules have already been imported"""
+    return sorted(_loaded)
@@ -0,0 +1,41 @@
+import pytest
+
+from app.services import crawler_registry
+from app.services.base_crawler import BaseCrawler
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    # Point the registry at a module that imports without httpx
+    monkeypatch.setattr(crawler_registry, "CRAWLERS", {
+        "fake": "app.services.base_crawler:BaseCrawler",
+    })
+    monkeypatch.setattr(crawler_registry, "_loaded", {})
+    return crawler_registry
+
+
+def test_unknown_site_returns_none(registry):
+    assert registry.load_crawler_class("nope") is None
+    assert registry.loaded_crawlers() == []
+
+
+def test_lookup_is_case_insensitive(registry):
+    assert registry.load_crawler_class("FAKE") is BaseCrawler
+    assert registry.loaded_crawlers() == ["fake"]
+
+
+def test_loaded_class_is_cached(registry, monkeypatch):
+    registry.load_crawler_class("fake")
+
+    def fail(name):
+        raise AssertionError(f"{name} imported twice")
+
+    monkeypatch.setattr(registry.importlib, "import_module", fail)
+    assert registry.load_crawler_class("fake") is BaseCrawler
+
+
+def test_warm_up_loads_every_registered_site(registry, monkeypatch):
+    monkeypatch.setitem(registry.CRAWLERS, "other", "app.services.base_crawler:BaseCrawler")
+    assert registry.loaded_crawlers() == []
+    assert registry.warm_up() == ["fake", "other"]
+    assert registry.loaded_crawlers() == ["fake", "other"]
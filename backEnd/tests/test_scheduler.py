@@ -0,0 +1,275 @@
+import asyncio
+
+import pytest
+
+from app.core import config
+from app.core.scheduler import Priority, UpstreamScheduler
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def hold(scheduler, session, account, priority, release, order=None, name=None):
+    """Take a slot, note the admission order, and hold it until released"""
+    async with scheduler.slot(session, account, priority):
+        if order is not None:
+            order.append(name)
+        await release.wait()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_global_limit():
+    async def scenario():
+        scheduler = UpstreamScheduler(2, 10, 10)
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(hold(scheduler, f"s{i}", f"a{i}", Priority.INTERACTIVE, release))
+            for i in range(3)
+        ]
+        await settle()
+        assert scheduler.metrics()["in_flight"] == 2
+        assert scheduler.metrics()["queue_depth"] == 1
+        release.set()
+        await asyncio.gather(*tasks)
+        assert scheduler.metrics()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_session_quota():
+    async def scenario():
+        scheduler = UpstreamScheduler(10, 1, 10)
+        release = asyncio.Event()
+        order = []
+        tasks = [
+            asyncio.create_task(hold(scheduler, "s1", "a1", Priority.INTERACTIVE, release, order, "s1-first")),
+            asyncio.create_task(hold(scheduler, "s1", "a1", Priority.INTERACTIVE, release, order, "s1-second")),
+            asyncio.create_task(hold(scheduler, "s2", "a1", Priority.INTERACTIVE, release, order, "s2")),
+        ]
+        await settle()
+        assert order == ["s1-first", "s2"]
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order[-1] == "s1-second"
+
+    run(scenario())
+
+
+def test_account_quota():
+    async def scenario():
+        scheduler = UpstreamScheduler(10, 10, 2)
+        release = asyncio.Event()
+        order = []
+        tasks = [
+            asyncio.create_task(hold(scheduler, f"s{i}", "a1", Priority.INTERACTIVE, release, order, f"a1-{i}"))
+            for i in range(3)
+        ]
+        tasks.append(asyncio.create_task(hold(scheduler, "s9", "a2", Priority.INTERACTIVE, release, order, "a2")))
+        await settle()
+        assert order == ["a1-0", "a1-1", "a2"]
+        release.set()
+        await asyncio.gather(*tasks)
+        assert order[-1] == "a1-2"
+
+    run(scenario())
+
+
+def test_bulk_share_leaves_room_for_interactive():
+    async def scenario():
+        scheduler = UpstreamScheduler(4, 10, 10, bulk_share=0.5)
+        release = asyncio.Event()
+        order = []
+        tasks = [
+            asyncio.create_task(hold(scheduler, f"b{i}", f"a{i}", Priority.BULK, release, order, f"bulk-{i}"))
+            for i in range(4)
+        ]
+        await settle()
+        assert order == ["bulk-0", "bulk-1"]
+        tasks.append(asyncio.create_task(hold(scheduler, "i", "ai", Priority.INTERACTIVE, release, order, "interactive")))
+        await settle()
+        assert order == ["bulk-0", "bulk-1", "interactive"]
+        release.set()
+        await asyncio.gather(*tasks)
+
+    run(scenario())
+
+
+def test_interactive_admitted_ahead_of_bulk():
+    async def scenario():
+        scheduler = UpstreamScheduler(1, 10, 10)
+        release = asyncio.Event()
+        order = []
+        blocker = asyncio.create_task(hold(scheduler, "x", "ax", Priority.INTERACTIVE, release))
+        await settle()
+        tasks = [
+            asyncio.create_task(hold(scheduler, "b", "other", Priority.BULK, asyncio.Event(), order, f"bulk-{i}"))
+            for i in range(5)
+        ]
+        tasks.append(asyncio.create_task(hold(scheduler, "i", "analyst", Priority.INTERACTIVE, asyncio.Event(), order, "interactive")))
+        await settle()
+        release.set()
+        await settle()
+        assert order == ["interactive"]
+        for task in tasks + [blocker]:
+            task.cancel()
+        await asyncio.gather(*tasks, blocker, return_exceptions=True)
+
+    run(scenario())
+
+
+def test_interactive_not_queued_behind_own_bulk_backlog():
+    async def scenario():
+        scheduler = UpstreamScheduler(1, 10, 10)
+        release = asyncio.Event()
+        order = []
+        blocker = asyncio.create_task(hold(scheduler, "x", "ax", Priority.INTERACTIVE, release))
+        await settle()
+        tasks = [
+            asyncio.create_task(hold(scheduler, "s1", "a1", Priority.BULK, asyncio.Event(), order, f"bulk-{i}"))
+            for i in range(20)
+        ]
+        await settle()
+        tasks.append(asyncio.create_task(hold(scheduler, "s1", "a1", Priority.INTERACTIVE, asyncio.Event(), order, "interactive")))
+        await settle()
+        release.set()
+        await settle()
+        assert order == ["interactive"]
+        for task in tasks + [blocker]:
+            task.cancel()
+        await asyncio.gather(*tasks, blocker, return_exceptions=True)
+
+    run(scenario())
+
+
+def test_bulk_cannot_fill_shared_account_quota_with_default_limits():
+    async def scenario():
+        scheduler = UpstreamScheduler(
+            config.UPSTREAM_MAX_CONCURRENCY,
+            config.UPSTREAM_SESSION_CONCURRENCY,
+            config.UPSTREAM_ACCOUNT_CONCURRENCY,
+            config.UPSTREAM_BULK_SHARE,
+        )
+        release = asyncio.Event()
+        order = []
+        tasks = [
+            asyncio.create_task(hold(scheduler, session, "fo1:5", Priority.BULK, release))
+            for session in ("downloader-1", "downloader-2")
+            for _ in range(10)
+        ]
+        await settle()
+        bulk = scheduler.metrics()["classes"]["bulk"]
+        assert bulk["in_flight"] < config.UPSTREAM_ACCOUNT_CONCURRENCY
+        assert bulk["queue_depth"] > 0
+
+        # A colleague on the same account and the downloader itself can still list deals
+        tasks.append(asyncio.create_task(hold(scheduler, "colleague", "fo1:5", Priority.INTERACTIVE, release, order, "colleague")))
+        tasks.append(asyncio.create_task(hold(scheduler, "downloader-1", "fo1:5", Priority.INTERACTIVE, release, order, "downloader")))
+        await settle()
+        assert sorted(order) == ["colleague", "downloader"]
+
+        release.set()
+        await asyncio.gather(*tasks)
+        assert scheduler.metrics()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_bulk_limits_leave_quota_headroom():
+    scheduler = UpstreamScheduler(16, 4, 8, bulk_share=0.5)
+    assert scheduler.session_bulk_concurrency == 2
+    assert scheduler.account_bulk_concurrency == 4
+
+    scheduler = UpstreamScheduler(16, 4, 8, bulk_share=1.0)
+    assert scheduler.bulk_concurrency == 15
+    assert scheduler.session_bulk_concurrency == 3
+    assert scheduler.account_bulk_concurrency == 7
+
+
+def test_cancel_while_queued():
+    async def scenario():
+        scheduler = UpstreamScheduler(1, 10, 10)
+        release = asyncio.Event()
+        holder = asyncio.create_task(hold(scheduler, "s1", "a1", Priority.INTERACTIVE, release))
+        await settle()
+        waiter = asyncio.create_task(hold(scheduler, "s2", "a2", Priority.INTERACTIVE, asyncio.Event()))
+        await settle()
+        assert scheduler.metrics()["queue_depth"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.metrics()["queue_depth"] == 0
+
+        release.set()
+        await holder
+        assert scheduler.metrics()["in_flight"] == 0
+
+    run(scenario())
+
+
+def test_cancel_in_same_tick_as_release_does_not_leak_slot():
+    async def scenario():
+        scheduler = UpstreamScheduler(1, 10, 10)
+        async with scheduler.slot("s1", "a1"):
+            waiter = asyncio.create_task(hold(scheduler, "s2", "a2", Priority.INTERACTIVE, asyncio.Event()))
+            await settle()
+            # Cancel the waiter and release the slot before its task can
+            # resume and leave the queue
+            waiter.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        metrics = scheduler.metrics()
+        assert metrics["in_flight"] == 0
+        assert metrics["queue_depth"] == 0
+
+        # Capacity is still available for new requests
+        async with scheduler.slot("s3", "a3"):
+            assert scheduler.metrics()["in_flight"] == 1
+
+    run(scenario())
+
+
+def test_metrics():
+    async def scenario():
+        scheduler = UpstreamScheduler(4, 10, 10, bulk_share=0.25)
+        release = asyncio.Event()
+        tasks = [
+            asyncio.create_task(hold(scheduler, "b", "a1", Priority.BULK, release)),
+            asyncio.create_task(hold(scheduler, "b", "a1", Priority.BULK, release)),
+            asyncio.create_task(hold(scheduler, "i", "a2", Priority.INTERACTIVE, release)),
+        ]
+        await settle()
+        metrics = scheduler.metrics()
+        assert metrics["max_concurrency"] == 4
+        assert metrics["bulk_concurrency"] == 1
+        assert metrics["in_flight"] == 2
+        assert metrics["queue_depth"] == 1
+        assert metrics["classes"]["bulk"]["queue_depth"] == 1
+        assert metrics["classes"]["bulk"]["in_flight"] == 1
+        assert metrics["classes"]["interactive"]["in_flight"] == 1
+        assert metrics["classes"]["interactive"]["admitted"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        metrics = scheduler.metrics()
+        assert metrics["classes"]["bulk"]["admitted"] == 2
+        assert metrics["classes"]["bulk"]["wait_ms_max"] >= metrics["classes"]["bulk"]["wait_ms_p50"]
+        assert metrics["classes"]["interactive"]["wait_ms_p99"] is not None
+
+    run(scenario())
+
+
+def test_metrics_without_samples():
+    scheduler = UpstreamScheduler(4, 2, 2)
+    metrics = scheduler.metrics()
+    assert metrics["in_flight"] == 0
+    for stats in metrics["classes"].values():
+        assert stats["wait_ms_p50"] is None
+        assert stats["queue_depth"] == 0
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from app.core import importtime, startup
+from app.services import crawler_registry
+
+
+@pytest.fixture
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(startup, "_state", {
+        "app_loaded": None,
+        "warm": None,
+        "first_request": None,
+    })
+    monkeypatch.setattr(startup, "_warm_up_error", None)
+    monkeypatch.setattr(crawler_registry, "_loaded", {})
+
+
+def test_readiness_after_warm_up(fresh_state, monkeypatch):
+    monkeypatch.setattr(crawler_registry, "CRAWLERS", {
+        "fake": "app.services.base_crawler:BaseCrawler",
+    })
+    report = startup.readiness()
+    assert report["ready"] is False
+    assert report["crawlers"] == []
+
+    asyncio.run(startup.warm_up())
+
+    report = startup.readiness()
+    assert report["ready"] is True
+    assert report["error"] is None
+    assert report["crawlers"] == ["fake"]
+    assert report["warm_ms"] is not None
+    assert report["target_ms"] == startup.STARTUP_TARGET_MS
+
+
+def test_readiness_reports_warm_up_error(fresh_state, monkeypatch):
+    monkeypatch.setattr(crawler_registry, "CRAWLERS", {
+        "broken": "app.services.does_not_exist:Crawler",
+    })
+
+    asyncio.run(startup.warm_up())
+
+    report = startup.readiness()
+    assert report["ready"] is False
+    assert report["error"].startswith("ModuleNotFoundError")
+    assert report["warm_ms"] is None
+
+
+def test_mark_keeps_first_time(fresh_state):
+    startup.mark("app_loaded")
+    first = startup.readiness()["app_loaded_ms"]
+    startup.mark("app_loaded")
+    assert startup.readiness()["app_loaded_ms"] == first
+
+
+async def _app(scope, receive, send):
+    pass
+
+
+@pytest.mark.parametrize("path", ["/", "/ready", "/metrics/scheduler", "/docs", "/openapi.json"])
+def test_first_request_skips_non_api_paths(fresh_state, path):
+    middleware = startup.FirstRequestMiddleware(_app)
+    asyncio.run(middleware({"type": "http", "path": path}, None, None))
+    assert startup.readiness()["first_request_ms"] is None
+
+
+def test_first_request_marked_on_arrival(fresh_state):
+    seen = []
+
+    async def app(scope, receive, send):
+        # Already marked while the request is still being handled
+        seen.append(startup.readiness()["first_request_ms"])
+
+    middleware = startup.FirstRequestMiddleware(app)
+    asyncio.run(middleware({"type": "http", "path": "/api/deals-list"}, None, None))
+    assert seen[0] is not None
+    assert startup.readiness()["first_request_ms"] == seen[0]
+
+
+IMPORTTIME_STDERR = """\
+import time: self [us] | cumulative | imported package
+import time:       150 |        150 |   _io
+import time:      1200 |       4500 | typing
+import time:       300 |        300 |     re._constants
+import time:      2000 |       2300 |   re
+some unrelated warning
+import time:       500 |      90000 | app.main
+"""
+
+
+def test_parse_importtime():
+    entries = importtime.parse_importtime(IMPORTTIME_STDERR)
+    assert [entry["module"] for entry in entries] == [
+        "app.main", "typing", "re", "re._constants", "_io",
+    ]
+    assert entries[0] == {
+        "module": "app.main",
+        "self_ms": 0.5,
+        "cumulative_ms": 90.0,
+        "depth": 0,
+    }
+    assert entries[2]["depth"] == 1
+    assert entries[3]["depth"] == 2
+
+
+def test_parse_importtime_limit():
+    entries = importtime.parse_importtime(IMPORTTIME_STDERR, limit=2)
+    assert [entry["module"] for entry in entries] == ["app.main", "typing"]